@@ -20,10 +20,16 @@
 #       responsible for any damage or data loss
 #       incurred with their use.
 
+import argparse
 import os
 import re
+import sys
+from bot import SparkBot, create_server
+from cassette import Cassette, CassetteMode, ErrorCassette
 from cmd2 import Cmd, make_option, options
+from collections import OrderedDict
 from library import Library
+from profiler import CommandProfiler
 from wrapper_apic import ErrorAPIC
 from wrapper_spark import WrapperSpark
 
@@ -32,9 +38,20 @@ class CmdAPIC(Cmd):
     prompt = 'apic_cmd# '
     intro = "Type 'help' to get a list of commands"
 
+    def __init__(self, cassette=None, profiler=None):
+        """
+        Create a new CLI instance.
+
+        :param cassette: (Optional) Cassette to record or replay all HTTP traffic.
+        :param profiler: (Optional) CommandProfiler to profile every command.
+        """
+        Cmd.__init__(self)
+        self.cassette = cassette
+        self.profiler = profiler
+
     @options([
         make_option('-m', '--max', type="int", help="Return only [n] devices"),
-        make_option('-s', '--spark', action="store_true", help="Send messages to Spark room")
+        make_option('-s', '--spark', action="store_true", help="Send messages to selected Spark rooms")
     ])
     def do_devices(self, args, opts=None):
         """
@@ -46,7 +63,7 @@ class CmdAPIC(Cmd):
             devices --spark --max=3
             devices -s -m 3
         """
-        if opts.spark and not self.spark.validate_token():
+        if opts.spark and (not self.rooms or not self.spark.validate_token()):
             print("Verify that a Spark user token is set via 'sparkuser' and a room is selected via 'sparkrooms'.")
             return
 
@@ -55,7 +72,7 @@ class CmdAPIC(Cmd):
         print(self.lib.cli_network_devices(devices))
 
         if opts.spark:
-            self.spark.post_message(self.room, text=self.lib.spark_network_devices(devices))
+            self.broadcast(self.lib.spark_network_devices(devices))
 
         return
 
@@ -66,7 +83,8 @@ class CmdAPIC(Cmd):
     ])
     def do_sparkrooms(self, args, opts=None):
         """
-         Lists all rooms that are connected to the current Spark user. You can also select a new room to post to Spark.
+         Lists all rooms that are connected to the current Spark user. You can also select one or more new rooms to
+         post to Spark.
 
          Syntax: sparkrooms [options]
          Examples:
@@ -100,17 +118,17 @@ class CmdAPIC(Cmd):
 
         for index, room in enumerate(req["items"], 1):
             room_line = {"index": index, "name": room["title"], "id": room["id"], "selected": ""}
-            if self.room == room_line["id"]:
+            if room_line["id"] in self.rooms:
                 room_line["selected"] = "XXXXXXXX"
             rooms.append(room_line)
 
-        if self.room is not None:
-            curr_room = self.spark.get_room(self.room)["title"]
+        if self.rooms:
+            curr_rooms = ", ".join(self.rooms.values())
         else:
-            curr_room = "none"
+            curr_rooms = "none"
 
         print("Numbers of rooms: {}".format(len(rooms)))
-        print("Currently selected room: {}".format(curr_room))
+        print("Currently selected rooms: {}".format(curr_rooms))
         print()
         labels = ["Index", "Selected", "Room Name", "Room ID"]
         lines = [len(e) * "=" for e in labels]
@@ -123,18 +141,21 @@ class CmdAPIC(Cmd):
             print("{:<8}{:<11}{:<22}{:<22}".format(room["index"], room["selected"], room["name"], room["id"]))
 
         print()
-        response = self.query_yes_no("Do you want to select a new Spark room?")
+        response = self.query_yes_no("Do you want to select new Spark rooms?")
 
         if response:
 
-            index = int(input("Index of new room: ")) - 1
+            try:
+                indices = [int(i) - 1 for i in input("Indices of new rooms (comma-separated): ").split(",")]
+            except ValueError:
+                indices = [-1]
 
-            if index < 0 or index > len(rooms) - 1:
-                print("Please select a valid index from the list above.")
+            if any(index < 0 or index > len(rooms) - 1 for index in indices):
+                print("Please select valid indices from the list above.")
                 return
 
-            self.room = rooms[index]["id"]
-            print("New room set to: {}".format(rooms[index]["name"]))
+            self.rooms = OrderedDict((rooms[index]["id"], rooms[index]["name"]) for index in indices)
+            print("New rooms set to: {}".format(", ".join(self.rooms.values())))
 
     def do_sparkuser(self, args):
         """
@@ -168,7 +189,7 @@ class CmdAPIC(Cmd):
                 print("New Spark user token is not valid.")
 
     @options([
-        make_option('-s', '--spark', action="store_true", help="Send messages to Spark room")
+        make_option('-s', '--spark', action="store_true", help="Send messages to selected Spark rooms")
     ])
     def do_pathtrace(self, args, opts=None):
         """
@@ -180,7 +201,7 @@ class CmdAPIC(Cmd):
              pathtrace -s
              pathtrace --spark
         """
-        if opts.spark and not self.spark.validate_token():
+        if opts.spark and (not self.rooms or not self.spark.validate_token()):
             print("Verfiy that a Spark user token is set via 'sparkuser' and a room is selected via 'sparkrooms'.")
             return
 
@@ -209,7 +230,110 @@ class CmdAPIC(Cmd):
         print(result_str)
 
         if opts.spark:
-            self.spark.post_message(self.room, text=result_str)
+            self.broadcast(result_str)
+
+    @options([
+        make_option('-l', '--host', type="str", default="127.0.0.1", help="Interface of the webhook receiver"),
+        make_option('-p', '--port', type="int", default=8080, help="TCP port of the webhook receiver"),
+        make_option('-w', '--workers', type="int", default=8, help="Number of worker threads"),
+        make_option('-u', '--userlimit', type="int", default=2, help="Commands running at once per Spark user")
+    ])
+    def do_bot(self, args, opts=None):
+        """
+         Runs the CLI as Spark bot. Spark webhooks for new messages must point to this host and port and must be
+         created with a secret. Messages like 'devices -m 3' or 'pathtrace 10.1.1.1 10.2.2.2' are executed and the
+         output is posted back to the room. By default, the receiver only listens on localhost.
+
+         Syntax: bot [options]
+         Examples:
+             bot
+             bot --port=8443
+             bot --host=0.0.0.0 -w 16 -u 1
+        """
+        if not self.spark.validate_token():
+            print("Please set your Spark user token first with the 'sparkuser' command.")
+            return
+
+        secret = input("Webhook secret: ")
+        if not secret:
+            print("Please enter the secret of the Spark webhook.")
+            return
+
+        bot = SparkBot(self.lib, self.spark, secret, workers=opts.workers, user_limit=opts.userlimit)
+        server = create_server(bot, host=opts.host, port=opts.port)
+
+        print("Listening for Spark webhooks on {}:{}. Press Ctrl+C to stop.".format(opts.host, opts.port))
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            print("Waiting for queued commands to finish.")
+            bot.scheduler.shutdown()
+            self.do_stats("")
+
+    def do_stats(self, args):
+        """
+         Shows how many GET requests were sent to APIC-EM and Spark and how many were saved because identical
+         requests of other threads were already in flight.
+
+         Syntax: stats
+         Example:
+             stats
+        """
+        for name, coalescer in (("APIC-EM", self.lib.apic.coalescer), ("Spark", self.spark.coalescer)):
+            stats = coalescer.stats()
+            print("{} GET requests sent: {}, saved: {}".format(name, stats["sent"], stats["saved"]))
+
+    def broadcast(self, text):
+        """
+        Post a message to all selected Spark rooms at once and print the result for each room.
+
+        :param text: The message, in plain text.
+        """
+        for result in self.spark.broadcast_message(list(self.rooms), text=text):
+            status = "OK" if result.success else result.error
+            print("Spark room '{}': {} ({:.2f} s)".format(self.rooms[result.room_id], status, result.elapsed))
+
+    def do_profile(self, args):
+        """
+         Enables or disables profiling of commands. Each profiled command prints its wall, CPU, wait and HTTP time and
+         writes a pstats file (.prof) and a collapsed stack file (.folded) for flamegraph tools.
+
+         Syntax: profile [on [directory] | off]
+         Examples:
+             profile
+             profile on
+             profile on ./profiles
+             profile off
+        """
+        words = str(args).split()
+
+        if not words:
+            if self.profiler is None:
+                print("Profiling is off.")
+            else:
+                print("Profiling is on. Files are written to: {}".format(self.profiler.output_dir))
+        elif words[0] == "on":
+            self.profiler = CommandProfiler(words[1] if len(words) > 1 else ".")
+            print("Profiling is on. Files are written to: {}".format(self.profiler.output_dir))
+        elif words[0] == "off":
+            self.profiler = None
+            print("Profiling is off.")
+        else:
+            print("Syntax: profile [on [directory] | off]")
+
+    def onecmd(self, line):
+        if self.profiler is None:
+            return Cmd.onecmd(self, line)
+
+        words = str(line).split()
+        if not words or words[0] == "profile":
+            return Cmd.onecmd(self, line)
+
+        return self.profiler.run(words[0], Cmd.onecmd, self, line)
 
     def precmd(self, line):
         print()
@@ -269,18 +393,50 @@ class CmdAPIC(Cmd):
             apic_pw = input("Password: ")
 
             try:
-                self.lib = Library(apic_host, apic_user, apic_pw)
-                self.spark = WrapperSpark(None)
-                self.room = None
+                self.lib = Library(apic_host, apic_user, apic_pw, cassette=self.cassette)
+                self.spark = WrapperSpark(None, cassette=self.cassette)
+                self.rooms = OrderedDict()
 
                 connected = True
-            except ErrorAPIC as e:
+            except (ErrorAPIC, ErrorCassette) as e:
                 print(str(e))
             finally:
                 print()
 
         os.system('cls' if os.name == 'nt' else 'clear')
 
+    def postloop(self):
+        if self.cassette is not None:
+            self.cassette.close()
+
 
 if __name__ == '__main__':
-    CmdAPIC().cmdloop()
+    parser = argparse.ArgumentParser(description="APIC-EM CLI")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--record", metavar="FILE", help="Record all HTTP traffic to a cassette file")
+    group.add_argument("--replay", metavar="FILE", help="Replay HTTP traffic from a cassette file")
+    parser.add_argument("--realtime", action="store_true", help="Replay with the recorded latency")
+    parser.add_argument("--profile", metavar="DIR",
+                        help="Profile every command and write the profile files to DIR, e.g. '.'")
+    args, rest = parser.parse_known_args()
+
+    # Remaining arguments are handed over to cmd2.
+    sys.argv = sys.argv[:1] + rest
+
+    try:
+        if args.record:
+            cassette = Cassette(args.record, CassetteMode.record)
+        elif args.replay:
+            cassette = Cassette(args.replay, CassetteMode.replay, realtime=args.realtime)
+        else:
+            cassette = None
+    except ErrorCassette as e:
+        print(str(e))
+        sys.exit(1)
+
+    if args.profile:
+        profiler = CommandProfiler(args.profile)
+    else:
+        profiler = None
+
+    CmdAPIC(cassette=cassette, profiler=profiler).cmdloop()
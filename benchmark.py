@@ -0,0 +1,208 @@
+#!/usr/bin/env python
+#
+#   benchmark
+#       v0.1
+#
+#   Offline benchmarks for the APIC-EM CLI. None of
+#   the benchmarks require a connection to APIC-EM.
+#
+#   REQUIREMENTS:
+#       - None
+#
+#   WARNING:
+#       Any use of these scripts and tools is at
+#       your own risk. There is no guarantee that
+#       they have been through thorough testing in a
+#       comparable environment and we are not
+#       responsible for any damage or data loss
+#       incurred with their use.
+
+import argparse
+import hashlib
+import hmac
+import http.client
+import json
+import threading
+import time
+import tracemalloc
+from bot import SparkBot, create_server
+from network_device import NetworkDevice
+
+
+def _fake_devices(count):
+    """
+    Generate devices in the format of the APIC-EM 'network-device' response.
+
+    :param count: Number of devices.
+    :return: List of device dictionaries.
+    """
+    devices = []
+    for i in range(count):
+        devices.append({
+            "hostname": "Branch-Access%i" % i,
+            "managementIpAddress": "10.%i.%i.%i" % ((i >> 16) & 255, (i >> 8) & 255, i & 255),
+            "upTime": "%i days, 6:22:19.43" % (i % 1000),
+            "lastUpdated": "2016-10-17 14:05:37"
+        })
+    return devices
+
+
+def _legacy_record(device):
+    """
+    Device representation used before NetworkDevice was introduced.
+    """
+    return {
+        "Device Name": device["hostname"],
+        "IP Address": str(device["managementIpAddress"]),
+        "Up Time": str(device["upTime"]),
+        "Last Updated": str(device["lastUpdated"])
+    }
+
+
+def _measure(factory, count):
+    """
+    Measure the memory retained by one record per device once the API response has been released.
+
+    :param factory: Function that turns a device dictionary into a record.
+    :param count: Number of devices.
+    :return: Retained bytes.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    raw = _fake_devices(count)
+    records = [factory(device) for device in raw]
+    del raw
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return after - before
+
+
+def bench_device_memory(count):
+    """
+    Compare memory per device of the legacy dictionaries and NetworkDevice records.
+
+    :param count: Number of devices.
+    """
+    legacy = _measure(_legacy_record, count)
+    compact = _measure(NetworkDevice.from_api, count)
+
+    print("Devices: {}".format(count))
+    print("{:<22}{:>16}{:>16}".format("Representation", "Total [KiB]", "Per device [B]"))
+    print("{:<22}{:>16.1f}{:>16.1f}".format("dict", legacy / 1024, legacy / count))
+    print("{:<22}{:>16.1f}{:>16.1f}".format("NetworkDevice", compact / 1024, compact / count))
+    print("Reduction: {:.1%}".format(1 - compact / legacy))
+
+
+class _StandInLibrary(object):
+    """
+    Stand-in for Library that simulates the latency of APIC-EM.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    def get_network_devices(self, max=None):
+        time.sleep(self.latency)
+        return []
+
+    def spark_network_devices(self, devices):
+        return ""
+
+    def pathtrace(self, src, dst):
+        time.sleep(self.latency * 10)
+        return ""
+
+
+class _StandInSpark(object):
+    """
+    Stand-in for WrapperSpark that simulates the latency of the Spark API.
+    """
+
+    def __init__(self, latency):
+        self.latency = latency
+        self.posted = 0
+        self.lock = threading.Lock()
+
+    def get_people_me(self):
+        return {"id": "bot"}
+
+    def get_message(self, message_id):
+        time.sleep(self.latency)
+        room, _ = message_id[len("msg-"):].split("-")
+        message = {"roomId": "room-" + room, "personId": "user-" + room}
+        if room == "0":
+            message["text"] = "pathtrace 10.0.0.1 10.0.0.2"
+        else:
+            message["text"] = "devices -m 3"
+        return message
+
+    def post_message(self, room_id=None, text=None, **kwargs):
+        time.sleep(self.latency)
+        with self.lock:
+            self.posted += 1
+
+
+def bench_bot(rooms, messages, workers, latency):
+    """
+    Measure the command throughput of the Spark bot against stand-in APIs. One room runs a long pathtrace while all
+    other rooms execute 'devices' commands.
+
+    :param rooms: Number of rooms.
+    :param messages: Number of messages per room.
+    :param workers: Number of worker threads.
+    :param latency: Simulated latency of a single API call in seconds.
+    """
+    spark = _StandInSpark(latency)
+    secret = "benchmark"
+    bot = SparkBot(_StandInLibrary(latency), spark, secret, workers=workers, user_limit=workers)
+    server = create_server(bot, host="127.0.0.1", port=0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    total = rooms * messages
+    start = time.perf_counter()
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1])
+
+    for i in range(messages):
+        for room in range(rooms):
+            body = json.dumps({"data": {"id": "msg-%i-%i" % (room, i)}}).encode("utf-8")
+            signature = hmac.new(secret.encode("utf-8"), body, hashlib.sha1).hexdigest()
+            conn.request("POST", "/", body=body,
+                         headers={"Content-Type": "application/json", "X-Spark-Signature": signature})
+            conn.getresponse().read()
+
+    conn.close()
+    bot.scheduler.join()
+    elapsed = time.perf_counter() - start
+
+    server.shutdown()
+    server.server_close()
+    bot.scheduler.shutdown()
+
+    if spark.posted != total:
+        print("Only {} of {} commands posted a result.".format(spark.posted, total))
+
+    print("Commands: {} in {} rooms, {} workers".format(total, rooms, workers))
+    print("Elapsed: {:.2f} s ({:.1f} commands/s)".format(elapsed, total / elapsed))
+    print("Sequential estimate: {:.2f} s".format(messages * (rooms - 1) * latency * 3 + messages * latency * 12))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the APIC-EM CLI.")
+    subparsers = parser.add_subparsers(dest="benchmark")
+
+    memory = subparsers.add_parser("memory", help="Memory per network device record")
+    memory.add_argument("-n", "--devices", type=int, default=100000, help="Number of devices")
+
+    bot = subparsers.add_parser("bot", help="Command throughput of the Spark bot")
+    bot.add_argument("-r", "--rooms", type=int, default=20, help="Number of rooms")
+    bot.add_argument("-m", "--messages", type=int, default=5, help="Number of messages per room")
+    bot.add_argument("-w", "--workers", type=int, default=8, help="Number of worker threads")
+    bot.add_argument("-l", "--latency", type=float, default=0.05, help="Simulated API latency in seconds")
+
+    args = parser.parse_args()
+
+    if args.benchmark == "bot":
+        bench_bot(args.rooms, args.messages, args.workers, args.latency)
+    else:
+        bench_device_memory(getattr(args, "devices", 100000))
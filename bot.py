@@ -0,0 +1,362 @@
+#!/usr/bin/env python
+#
+#   bot
+#       v0.1
+#
+#   This class runs the APIC-EM CLI as Spark bot. A
+#   local webhook receiver accepts Spark messages
+#   and executes the commands on a worker pool.
+#
+#   REQUIREMENTS:
+#       - None
+#
+#   WARNING:
+#       Any use of these scripts and tools is at
+#       your own risk. There is no guarantee that
+#       they have been through thorough testing in a
+#       comparable environment and we are not
+#       responsible for any damage or data loss
+#       incurred with their use.
+
+import hashlib
+import hmac
+import json
+import optparse
+import re
+import shlex
+import threading
+from collections import defaultdict, deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+"""
+Commands that can be executed from a Spark room
+"""
+BOT_COMMANDS = ("devices", "pathtrace")
+
+IP_PATTERN = re.compile(r"^\d{1,3}\.\d{1,3}\.\d{1,3}\.\d{1,3}$")
+
+"""
+Maximum size of a webhook event in bytes. Spark events only reference the message and are much smaller.
+"""
+MAX_EVENT_SIZE = 64 * 1024
+
+
+class ErrorBot(Exception):
+    """
+    Generic error raised by the bot module.
+    """
+
+
+class _OptionParser(optparse.OptionParser):
+    """
+    Option parser that raises an error instead of exiting the process.
+    """
+
+    def error(self, msg):
+        raise ErrorBot(msg)
+
+
+class CommandScheduler(object):
+    """
+    Executes jobs on a worker pool. Jobs of the same room run one after another in the order they were submitted,
+    jobs of different rooms run concurrently. Each user can only have a limited number of jobs running at once.
+    """
+
+    def __init__(self, workers=8, user_limit=2):
+        """
+        Create a new scheduler.
+
+        :param workers: (Optional) Number of worker threads. Default is 8.
+        :param user_limit: (Optional) Maximum number of jobs running at once per user. Default is 2.
+        """
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.user_limit = user_limit
+        self.lock = threading.Lock()
+        self.idle = threading.Condition(self.lock)
+        self.rooms = defaultdict(deque)
+        self.active_rooms = set()
+        self.active_users = defaultdict(int)
+        self.pending = 0
+        self.closed = False
+
+    def submit(self, room_id, user_id, func):
+        """
+        Queue a job.
+
+        :param room_id: Room the job belongs to.
+        :param user_id: User who requested the job.
+        :param func: Function without arguments that performs the job.
+        """
+        with self.lock:
+            if self.closed:
+                raise ErrorBot("Scheduler is shut down")
+
+            self.rooms[room_id].append((user_id, func))
+            self.pending += 1
+            self._dispatch()
+
+    def join(self, timeout=None):
+        """
+        Wait until all queued jobs are finished.
+
+        :param timeout: (Optional) Maximum time to wait in seconds.
+        :return: True, if all jobs are finished.
+        """
+        with self.lock:
+            return self.idle.wait_for(lambda: self.pending == 0, timeout)
+
+    def shutdown(self):
+        """
+        Stop accepting new jobs, wait until all queued jobs are finished and stop the worker pool.
+        """
+        with self.lock:
+            self.closed = True
+
+        self.join()
+        self.executor.shutdown(wait=True)
+
+    def _dispatch(self):
+        """
+        Start the next job of every room that is idle and whose user is below the limit. Caller must hold the lock.
+        """
+        for room_id, queue in list(self.rooms.items()):
+            if room_id in self.active_rooms:
+                continue
+
+            user_id, func = queue[0]
+            if self.active_users[user_id] >= self.user_limit:
+                continue
+
+            queue.popleft()
+            if not queue:
+                del self.rooms[room_id]
+
+            self.active_rooms.add(room_id)
+            self.active_users[user_id] += 1
+            self.executor.submit(self._run, room_id, user_id, func)
+
+    def _run(self, room_id, user_id, func):
+        """
+        Run a single job and start the jobs that were waiting for it.
+        """
+        try:
+            func()
+        finally:
+            with self.lock:
+                self.active_rooms.discard(room_id)
+                self.active_users[user_id] -= 1
+                if self.active_users[user_id] == 0:
+                    del self.active_users[user_id]
+
+                self.pending -= 1
+                self._dispatch()
+
+                if self.pending == 0:
+                    self.idle.notify_all()
+
+
+class SparkBot(object):
+    """
+    Translates Spark messages into CLI commands and posts the results back to the room.
+    """
+
+    def __init__(self, lib, spark, secret, workers=8, user_limit=2):
+        """
+        Create a new bot.
+
+        :param lib: Authenticated Library instance shared by all commands.
+        :param spark: WrapperSpark instance with a valid user token.
+        :param secret: Secret of the Spark webhook, used to verify the signature of incoming events.
+        :param workers: (Optional) Number of worker threads. Default is 8.
+        :param user_limit: (Optional) Maximum number of commands running at once per user. Default is 2.
+        """
+        if not secret:
+            raise ErrorBot("A webhook secret is required.")
+
+        self.lib = lib
+        self.spark = spark
+        self.secret = secret.encode("utf-8")
+        self.scheduler = CommandScheduler(workers, user_limit)
+
+        me = spark.get_people_me()
+        self.person_id = me["id"] if me is not None else None
+
+    def verify_signature(self, body, signature):
+        """
+        Verify the 'X-Spark-Signature' header of a webhook event.
+
+        :param body: Raw request body as bytes.
+        :param signature: Value of the signature header.
+        :return: True, if the event was signed with the webhook secret.
+        """
+        if not signature:
+            return False
+
+        expected = hmac.new(self.secret, body, hashlib.sha1).hexdigest()
+        return hmac.compare_digest(expected, signature.lower())
+
+    def handle_event(self, event):
+        """
+        Queue the command of a Spark webhook event. The event only references the message; room, sender and text
+        are taken from the message fetched from Spark.
+
+        :param event: Webhook event in JSON.
+        """
+        message_id = event.get("data", {}).get("id")
+        if message_id is None:
+            return
+
+        message = self.spark.get_message(message_id)
+        room_id = message.get("roomId")
+        person_id = message.get("personId")
+        text = message.get("text", "")
+
+        # Messages of the bot itself also trigger the webhook.
+        if room_id is None or person_id == self.person_id:
+            return
+
+        self.scheduler.submit(room_id, person_id, lambda: self._execute(room_id, text))
+
+    def execute_text(self, text):
+        """
+        Execute a command and return its output.
+
+        :param text: Message text, e.g. 'devices -m 3' or 'pathtrace 10.1.1.1 10.2.2.2'.
+        :return: String formatted to print in a Spark room.
+        """
+        cmd, args = self.parse_command(text)
+
+        if cmd == "devices":
+            parser = _OptionParser(prog="devices", add_help_option=False)
+            parser.add_option('-m', '--max', type="int")
+            opts, _ = parser.parse_args(args)
+
+            devices = self.lib.get_network_devices(max=opts.max)
+            return self.lib.spark_network_devices(devices)
+
+        if len(args) != 2 or not all(IP_PATTERN.match(ip) for ip in args):
+            raise ErrorBot("Syntax: pathtrace <source IP> <destination IP>")
+
+        return self.lib.pathtrace(args[0], args[1])
+
+    @staticmethod
+    def parse_command(text):
+        """
+        Split a message into command and arguments. Leading words, e.g. the mention of the bot, are skipped.
+
+        :param text: Message text.
+        :return: Tuple of command name and list of arguments.
+        """
+        try:
+            tokens = shlex.split(text)
+        except ValueError as e:
+            raise ErrorBot(str(e))
+
+        for index, token in enumerate(tokens):
+            if token.lower() in BOT_COMMANDS:
+                return token.lower(), tokens[index + 1:]
+
+        raise ErrorBot("Unknown command. Supported commands: {}".format(", ".join(BOT_COMMANDS)))
+
+    def _execute(self, room_id, text):
+        """
+        Execute the command of a message and post the result.
+        """
+        try:
+            result = self.execute_text(text)
+        except ErrorBot as e:
+            result = str(e)
+        except Exception as e:
+            result = "Command failed: {}".format(e)
+
+        try:
+            self.spark.post_message(room_id, text=result)
+        except Exception as e:
+            print("Posting to room {} failed: {}".format(room_id, e))
+
+
+class _ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class _WebhookHandler(BaseHTTPRequestHandler):
+    """
+    Accepts Spark webhook events and hands them over to the bot.
+    """
+
+    # Socket timeout in seconds, so that clients sending less than the announced body cannot block a thread.
+    timeout = 10
+
+    def do_POST(self):
+        # The length is checked before the body is read, so that unauthenticated clients cannot block a thread.
+        length = self.headers.get("Content-Length")
+        if length is None:
+            self._reply(411)
+            return
+
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+
+        if length < 0:
+            self._reply(400)
+            return
+        if length > MAX_EVENT_SIZE:
+            self._reply(413)
+            return
+
+        body = self.rfile.read(length)
+
+        if not self.server.bot.verify_signature(body, self.headers.get("X-Spark-Signature")):
+            self.send_response(403)
+            self.end_headers()
+            return
+
+        try:
+            event = json.loads(body.decode("utf-8"))
+        except ValueError:
+            self.send_response(400)
+            self.end_headers()
+            return
+
+        try:
+            self.server.bot.handle_event(event)
+        except ErrorBot:
+            self.send_response(503)
+            self.end_headers()
+            return
+        except Exception as e:
+            print("Webhook event could not be handled: {}".format(e))
+            self.send_response(502)
+            self.end_headers()
+            return
+
+        self.send_response(200)
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status):
+        self.send_response(status)
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+
+def create_server(bot, host="127.0.0.1", port=8080):
+    """
+    Create a webhook receiver for a bot. Call 'serve_forever' on the returned server to start it.
+
+    :param bot: SparkBot instance.
+    :param host: (Optional) Interface to listen on. Default is localhost only; use a reverse proxy or tunnel to
+                 make it reachable for Spark, or '0.0.0.0' to listen on all interfaces.
+    :param port: (Optional) TCP port to listen on. Default is 8080.
+    :return: HTTP server instance.
+    """
+    server = _ThreadingHTTPServer((host, port), _WebhookHandler)
+    server.bot = bot
+    return server
@@ -0,0 +1,269 @@
+#!/usr/bin/env python
+#
+#   cassette
+#       v0.1
+#
+#   This class records HTTP traffic of the APIC-EM
+#   and Spark wrappers to a file and replays it
+#   later without a connection to the APIs.
+#
+#   REQUIREMENTS:
+#       - requests
+#
+#   WARNING:
+#       Any use of these scripts and tools is at
+#       your own risk. There is no guarantee that
+#       they have been through thorough testing in a
+#       comparable environment and we are not
+#       responsible for any damage or data loss
+#       incurred with their use.
+
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from enum import Enum
+from requests.structures import CaseInsensitiveDict
+
+"""
+Resources whose request body contains credentials. Their body is not part of the request key.
+"""
+CREDENTIAL_RESOURCES = ("/ticket",)
+
+"""
+Response headers that are not recorded
+"""
+REDACTED_HEADERS = ("set-cookie",)
+
+"""
+Placeholder for secrets in recorded responses
+"""
+REDACTED = "REDACTED"
+
+
+class CassetteMode(Enum):
+    record = 1
+    replay = 2
+
+
+class ErrorCassette(Exception):
+    """
+    Generic error raised by the cassette module.
+    """
+
+
+class ReplayResponse(object):
+    """
+    Minimal stand-in for 'requests.Response' that is returned during replay.
+    """
+
+    __slots__ = ("status_code", "headers", "content", "encoding")
+
+    def __init__(self, status_code, headers, content):
+        """
+        Create a new replayed response.
+
+        :param status_code: HTTP status code.
+        :param headers: Dictionary of response headers.
+        :param content: Response body as bytes.
+        """
+        self.status_code = status_code
+        self.headers = CaseInsensitiveDict(headers)
+        self.content = content
+        self.encoding = None
+
+    def json(self):
+        """
+        :return: Response body parsed from JSON.
+        """
+        return json.loads(self.content.decode("utf-8"))
+
+
+class Cassette(object):
+    """
+    Records or replays HTTP interactions. A cassette is a gzip compressed file with one JSON object per interaction.
+    """
+
+    def __init__(self, path, mode, realtime=False):
+        """
+        Open a cassette.
+
+        :param path: Path to the cassette file.
+        :param mode: Record or replay enum from CassetteMode.
+        :param realtime: (Optional) Wait for the recorded latency of each interaction during replay. Default is False.
+        """
+        self.path = path
+        self.mode = mode
+        self.realtime = realtime
+        self.interactions = defaultdict(deque)
+        self.file = None
+
+        # Requests are sent from several threads, e.g. by the bot workers and broadcasts.
+        self.lock = threading.Lock()
+
+        if mode == CassetteMode.record:
+            try:
+                self.file = gzip.open(path, "wt", encoding="utf-8")
+            except OSError as e:
+                raise ErrorCassette("Cassette '{}' could not be created: {}".format(path, e))
+        elif mode == CassetteMode.replay:
+            self._load()
+        else:
+            raise ErrorCassette("Internal error")
+
+    @staticmethod
+    def request_key(method, url, data=None):
+        """
+        Build the lookup key of a request. Authentication headers are not part of the key because tokens change
+        between sessions. The body is only stored as hash; for login requests it is left out completely, so that
+        no credentials end up in the cassette and any credentials are accepted during replay.
+
+        :param method: HTTP method.
+        :param url: Full URL including query parameters.
+        :param data: (Optional) Request body.
+        :return: Key as string.
+        """
+        if data is None or Cassette.is_credential_resource(url):
+            digest = "-"
+        else:
+            if isinstance(data, str):
+                data = data.encode("utf-8")
+            digest = hashlib.sha1(data).hexdigest()
+
+        return "{} {} {}".format(method, url, digest)
+
+    @staticmethod
+    def is_credential_resource(url):
+        """
+        :param url: Full URL including query parameters.
+        :return: True, if requests to this URL carry credentials, e.g. the APIC-EM login.
+        """
+        return url.split("?")[0].endswith(CREDENTIAL_RESOURCES)
+
+    def request(self, session, method, url, data=None, **kwargs):
+        """
+        Send a request through the cassette. Signature matches 'requests.Session.request'.
+
+        :param session: Session used to send the request while recording.
+        :param method: HTTP method.
+        :param url: Full URL including query parameters.
+        :param data: (Optional) Request body.
+        :param kwargs: Further arguments passed to 'requests.Session.request'.
+        :return: Real response while recording, ReplayResponse while replaying.
+        """
+        key = self.request_key(method, url, data)
+
+        if self.mode == CassetteMode.replay:
+            return self._replay(key)
+
+        start = time.perf_counter()
+        response = session.request(method, url, data=data, **kwargs)
+        latency = time.perf_counter() - start
+
+        self._record(key, response, latency, self.is_credential_resource(url))
+
+        return response
+
+    def close(self):
+        """
+        Flush and close the cassette file.
+        """
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def _record(self, key, response, latency, credential=False):
+        """
+        Append a single interaction to the cassette file. Cookies and, for login requests, the service ticket are
+        not recorded.
+        """
+        content = response.content
+
+        if credential:
+            content = self._redact_ticket(content)
+
+        try:
+            body = content.decode("utf-8")
+            binary = False
+        except UnicodeDecodeError:
+            body = base64.b64encode(content).decode("ascii")
+            binary = True
+
+        entry = {
+            "key": key,
+            "status": response.status_code,
+            "headers": {k: v for k, v in response.headers.items() if k.lower() not in REDACTED_HEADERS},
+            "body": body,
+            "binary": binary,
+            "latency": round(latency, 6)
+        }
+
+        line = json.dumps(entry, separators=(",", ":")) + "\n"
+
+        with self.lock:
+            if self.file is None:
+                raise ErrorCassette("Cassette '{}' is closed".format(self.path))
+
+            self.file.write(line)
+            self.file.flush()
+
+    @staticmethod
+    def _redact_ticket(content):
+        """
+        Replace the service ticket in the response of an APIC-EM login.
+        """
+        try:
+            body = json.loads(content.decode("utf-8"))
+            body["response"]["serviceTicket"] = REDACTED
+        except (ValueError, KeyError, TypeError):
+            return content
+
+        return json.dumps(body).encode("utf-8")
+
+    def _load(self):
+        """
+        Read all interactions from the cassette file and index them by request key. Cassettes of a recording that
+        was not closed, e.g. after a crash, lack the end of the gzip stream; all interactions up to that point are
+        loaded, because every interaction is flushed when it is recorded.
+        """
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as f:
+                try:
+                    for line in f:
+                        if line.strip():
+                            entry = json.loads(line)
+                            self.interactions[entry["key"]].append(entry)
+                except EOFError:
+                    pass
+        except (OSError, ValueError, KeyError) as e:
+            raise ErrorCassette("Cassette '{}' could not be loaded: {}".format(self.path, e))
+
+    def _replay(self, key):
+        """
+        Return the next recorded response for a request key. Interactions are replayed in the recorded order; the
+        last response of a key is repeated once all others have been consumed.
+        """
+        with self.lock:
+            queue = self.interactions.get(key)
+
+            if not queue:
+                raise ErrorCassette("No recorded interaction for request: {}".format(key))
+
+            if len(queue) > 1:
+                entry = queue.popleft()
+            else:
+                entry = queue[0]
+
+        if self.realtime:
+            time.sleep(entry["latency"])
+
+        if entry["binary"]:
+            content = base64.b64decode(entry["body"])
+        else:
+            content = entry["body"].encode("utf-8")
+
+        return ReplayResponse(entry["status"], entry["headers"], content)
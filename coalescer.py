@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+#
+#   coalescer
+#       v0.1
+#
+#   This class lets concurrent identical requests
+#   share a single in-flight HTTP call.
+#
+#   REQUIREMENTS:
+#       - None
+#
+#   WARNING:
+#       Any use of these scripts and tools is at
+#       your own risk. There is no guarantee that
+#       they have been through thorough testing in a
+#       comparable environment and we are not
+#       responsible for any damage or data loss
+#       incurred with their use.
+
+import threading
+
+
+class _InFlight(object):
+    """
+    A single in-flight call that other threads can wait for.
+    """
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class RequestCoalescer(object):
+    """
+    Coalesces concurrent calls with the same key. The first caller performs the call, all callers that arrive while
+    it is in flight wait for it and receive the same result or exception.
+    """
+
+    def __init__(self):
+        """
+        Create a new coalescer.
+        """
+        self.lock = threading.Lock()
+        self.in_flight = {}
+        self.requests_sent = 0
+        self.requests_saved = 0
+
+    def call(self, key, func):
+        """
+        Perform a call or join an identical call that is already in flight.
+
+        :param key: Hashable key that identifies identical calls.
+        :param func: Function without arguments that performs the call.
+        :return: Return value of the function.
+        """
+        with self.lock:
+            call = self.in_flight.get(key)
+
+            if call is None:
+                call = _InFlight()
+                self.in_flight[key] = call
+                self.requests_sent += 1
+                leader = True
+            else:
+                self.requests_saved += 1
+                leader = False
+
+        if leader:
+            try:
+                call.result = func()
+            except Exception as e:
+                call.error = e
+            finally:
+                with self.lock:
+                    del self.in_flight[key]
+                call.done.set()
+        else:
+            call.done.wait()
+
+        if call.error is not None:
+            raise call.error
+
+        return call.result
+
+    def stats(self):
+        """
+        :return: Dictionary with the number of sent and saved requests.
+        """
+        with self.lock:
+            return {"sent": self.requests_sent, "saved": self.requests_saved}
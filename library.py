@@ -24,6 +24,7 @@ import io
 import json
 import time
 from enums import ApiRequest
+from network_device import NetworkDevice
 from wrapper_apic import WrapperAPIC
 
 
@@ -32,22 +33,23 @@ class Library(object):
     Library to bundle APIC-EM API requests and process responses to hand over to the CLI.
     """
 
-    def __init__(self, apic_host, apic_user, apic_pw):
+    def __init__(self, apic_host, apic_user, apic_pw, cassette=None):
         """
         Create a new Library instance.
 
         :param apic_host: URL/Host to APIC-EM.
         :param apic_user: Username to access API.
         :param apic_pw: Password to access API.
+        :param cassette: (Optional) Cassette to record or replay all HTTP traffic.
         """
-        self.apic = WrapperAPIC(apic_host, apic_user, apic_pw)
+        self.apic = WrapperAPIC(apic_host, apic_user, apic_pw, cassette=cassette)
 
     def get_network_devices(self, max=None):
         """
         Fetch list of network devices from APIC-EM.
 
         :param max: Maximum number of returned devices.
-        :return: List of network devices.
+        :return: List of NetworkDevice records.
         """
         uri = "network-device"
         if max is not None:
@@ -55,18 +57,7 @@ class Library(object):
 
         res = self.apic.send_request(uri, ApiRequest.get)
 
-        devices = []
-
-        for device in res["response"]:
-            device_info = {
-                "Device Name": device["hostname"],
-                "IP Address": str(device["managementIpAddress"]),
-                "Up Time": str(device["upTime"]),
-                "Last Updated": str(device["lastUpdated"])
-            }
-            devices.append(device_info)
-
-        return devices
+        return [NetworkDevice.from_api(device) for device in res["response"]]
 
     def cli_network_devices(self, devices):
         """
@@ -85,8 +76,8 @@ class Library(object):
 
         for device in devices:
             print("{:<22}{:<22}{:<22}{:<22}".format(
-                device['Device Name'], device['IP Address'], device['Up Time'],
-                device['Last Updated']),
+                device.hostname, device.ip_address, device.up_time_str,
+                device.last_updated_str),
                 file=result_str
             )
 
@@ -104,14 +95,14 @@ class Library(object):
         """
         result_str = io.StringIO()
         ctr = 1
-        labels = ["Device Name", "IP Address", "Up Time", "Last Updated"]
 
         for device in devices:
             print(file=result_str)
             print("[Device #%i]" % ctr, file=result_str)
-
-            for l in labels:
-                print("{}: {}".format(l, device[l]), file=result_str)
+            print("Device Name: {}".format(device.hostname), file=result_str)
+            print("IP Address: {}".format(device.ip_address), file=result_str)
+            print("Up Time: {}".format(device.up_time_str), file=result_str)
+            print("Last Updated: {}".format(device.last_updated_str), file=result_str)
 
             ctr += 1
 
@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+#
+#   network_device
+#       v0.1
+#
+#   This class provides a compact record to hold
+#   network devices fetched from the APIC-EM API.
+#
+#   REQUIREMENTS:
+#       - None
+#
+#   WARNING:
+#       Any use of these scripts and tools is at
+#       your own risk. There is no guarantee that
+#       they have been through thorough testing in a
+#       comparable environment and we are not
+#       responsible for any damage or data loss
+#       incurred with their use.
+
+import ipaddress
+import re
+from datetime import datetime
+
+"""
+Format of the 'upTime' field returned by the APIC-EM API, e.g. '474 days, 6:22:19.43'.
+"""
+UPTIME_PATTERN = re.compile(r"^(?:(\d+) days?, )?(\d+):(\d+):(\d+(?:\.\d+)?)$")
+
+"""
+Format of the 'lastUpdated' field returned by the APIC-EM API, e.g. '2016-10-17 14:05:36'.
+"""
+LAST_UPDATED_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+"""
+Flag of an uptime format code: the uptime string has a days part. The lower bits hold the number of fractional digits.
+"""
+UPTIME_DAYS = 16
+
+
+def parse_uptime_format(value):
+    """
+    Convert an APIC-EM uptime string into seconds and a format code to restore the string with 'format_uptime'.
+
+    :param value: Uptime string from the API, e.g. '474 days, 6:22:19.43'.
+    :return: Tuple of uptime in seconds and format code, or (None, None) if the string cannot be parsed.
+    """
+    if value is None:
+        return None, None
+
+    match = UPTIME_PATTERN.match(str(value).strip())
+    if match is None:
+        return None, None
+
+    days, hours, minutes, seconds = match.groups()
+    digits = len(seconds.partition(".")[2])
+    seconds = float(seconds) if digits else int(seconds)
+
+    uptime = int(days or 0) * 86400 + int(hours) * 3600 + int(minutes) * 60 + seconds
+    return uptime, digits | (UPTIME_DAYS if days is not None else 0)
+
+
+def parse_uptime(value):
+    """
+    Convert an APIC-EM uptime string into seconds.
+
+    :param value: Uptime string from the API, e.g. '474 days, 6:22:19.43'.
+    :return: Uptime in seconds, as float if the string has fractional seconds and as int otherwise. None if the
+             string cannot be parsed.
+    """
+    return parse_uptime_format(value)[0]
+
+
+def format_uptime(seconds, fmt=None):
+    """
+    Convert seconds back into the uptime format used by the APIC-EM API.
+
+    :param seconds: Uptime in seconds.
+    :param fmt: (Optional) Format code from 'parse_uptime_format'. Without it, floats are shown with two fractional
+                digits and a days part is only shown for uptimes of one day or more.
+    :return: Uptime string, e.g. '474 days, 6:22:19.43'.
+    """
+    if seconds is None:
+        return "None"
+
+    if fmt is None:
+        digits = 2 if isinstance(seconds, float) else 0
+        with_days = seconds >= 86400
+    else:
+        digits = fmt & (UPTIME_DAYS - 1)
+        with_days = bool(fmt & UPTIME_DAYS)
+
+    # Round to the shown precision first, so that e.g. 59.999 s carries over into the next minute.
+    scale = 10 ** digits
+    units = int(round(seconds * scale))
+
+    if with_days:
+        days, units = divmod(units, 86400 * scale)
+    hours, units = divmod(units, 3600 * scale)
+    minutes, units = divmod(units, 60 * scale)
+    secs, fraction = divmod(units, scale)
+
+    clock = "{}:{:02d}:{:02d}".format(hours, minutes, secs)
+    if digits:
+        clock += ".{:0{}d}".format(fraction, digits)
+
+    if with_days:
+        return "{} {}, {}".format(days, "day" if days == 1 else "days", clock)
+    return clock
+
+
+class NetworkDevice(object):
+    """
+    Compact record of a single network device. Values are stored as parsed types; formatting is left to the renderers.
+    Values that cannot be parsed or would not be displayed exactly as returned by the API are kept as raw strings.
+    """
+
+    __slots__ = ("hostname", "ip_packed", "up_time", "up_time_format", "last_updated", "raw")
+
+    def __init__(self, hostname, ip_packed, up_time, last_updated, raw=None, up_time_format=None):
+        """
+        Create a new network device record.
+
+        :param hostname: Host name of the device.
+        :param ip_packed: Management IP address in packed binary form, or None.
+        :param up_time: Uptime in seconds, or None.
+        :param last_updated: Datetime of the last inventory update, or None.
+        :param raw: (Optional) Dictionary of raw strings for the fields 'ip_address', 'up_time' and 'last_updated'.
+                    They are displayed instead of the parsed values.
+        :param up_time_format: (Optional) Format code of the uptime from 'parse_uptime_format'.
+        """
+        self.hostname = hostname
+        self.ip_packed = ip_packed
+        self.up_time = up_time
+        self.up_time_format = up_time_format
+        self.last_updated = last_updated
+        self.raw = raw
+
+    @classmethod
+    def from_api(cls, device):
+        """
+        Create a record from a single device of the APIC-EM 'network-device' response.
+
+        :param device: Device dictionary from the API response.
+        :return: New NetworkDevice instance.
+        """
+        try:
+            ip_packed = ipaddress.ip_address(device["managementIpAddress"]).packed
+        except ValueError:
+            ip_packed = None
+
+        up_time, up_time_format = parse_uptime_format(device["upTime"])
+
+        try:
+            last_updated = datetime.strptime(str(device["lastUpdated"]), LAST_UPDATED_FORMAT)
+        except ValueError:
+            last_updated = None
+
+        record = cls(device["hostname"], ip_packed, up_time, last_updated, up_time_format=up_time_format)
+
+        # Keep the raw string of every value that would not be displayed exactly as returned by the API.
+        raw = {}
+        if record.ip_address != str(device["managementIpAddress"]):
+            raw["ip_address"] = str(device["managementIpAddress"])
+        if record.up_time_str != str(device["upTime"]):
+            raw["up_time"] = str(device["upTime"])
+        if record.last_updated_str != str(device["lastUpdated"]):
+            raw["last_updated"] = str(device["lastUpdated"])
+
+        record.raw = raw or None
+        return record
+
+    @property
+    def ip_address(self):
+        """
+        :return: Management IP address as string.
+        """
+        if self.ip_packed is None or self._has_raw("ip_address"):
+            return self._raw("ip_address")
+        return str(ipaddress.ip_address(self.ip_packed))
+
+    @property
+    def up_time_str(self):
+        """
+        :return: Uptime as string in the format of the APIC-EM API.
+        """
+        if self.up_time is None or self._has_raw("up_time"):
+            return self._raw("up_time")
+        return format_uptime(self.up_time, self.up_time_format)
+
+    @property
+    def last_updated_str(self):
+        """
+        :return: Last inventory update as string in the format of the APIC-EM API.
+        """
+        if self.last_updated is None or self._has_raw("last_updated"):
+            return self._raw("last_updated")
+        return self.last_updated.strftime(LAST_UPDATED_FORMAT)
+
+    def _has_raw(self, field):
+        """
+        :return: True, if a raw string is kept for a field.
+        """
+        return self.raw is not None and field in self.raw
+
+    def _raw(self, field):
+        """
+        :return: Raw string of a field that could not be parsed, or 'None' if the API returned no value.
+        """
+        if self.raw is None:
+            return "None"
+        return self.raw.get(field, "None")
+
+    def __repr__(self):
+        return "NetworkDevice({!r}, {})".format(self.hostname, self.ip_address)
@@ -0,0 +1,148 @@
+#!/usr/bin/env python
+#
+#   profiler
+#       v0.1
+#
+#   This class profiles single CLI commands and
+#   writes pstats and collapsed stack files that
+#   can be turned into flamegraphs.
+#
+#   REQUIREMENTS:
+#       - None
+#
+#   WARNING:
+#       Any use of these scripts and tools is at
+#       your own risk. There is no guarantee that
+#       they have been through thorough testing in a
+#       comparable environment and we are not
+#       responsible for any damage or data loss
+#       incurred with their use.
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from collections import Counter
+
+"""
+Name of the wrapper methods that send HTTP requests. Time spent in them is reported as network time.
+"""
+HTTP_FUNCTIONS = ("_http",)
+
+
+class _StackSampler(threading.Thread):
+    """
+    Samples the call stack of another thread in a fixed interval.
+    """
+
+    def __init__(self, thread_id, interval):
+        """
+        Create a new sampler.
+
+        :param thread_id: Identifier of the thread to sample.
+        :param interval: Sampling interval in seconds.
+        """
+        threading.Thread.__init__(self, daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            stack = []
+
+            while frame is not None:
+                stack.append("{}:{}".format(os.path.basename(frame.f_code.co_filename), frame.f_code.co_name))
+                frame = frame.f_back
+
+            if stack:
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self):
+        """
+        Stop sampling and wait for the thread to finish.
+        """
+        self.stopped.set()
+        self.join()
+
+
+class CommandProfiler(object):
+    """
+    Profiles commands with cProfile and a stack sampler. Each profiled command writes a pstats file (.prof) and a
+    file with collapsed stacks (.folded) for flamegraph tools.
+    """
+
+    def __init__(self, output_dir=".", interval=0.005):
+        """
+        Create a new profiler.
+
+        :param output_dir: (Optional) Directory for the profile files. Default is the working directory.
+        :param interval: (Optional) Sampling interval of the stack sampler in seconds. Default is 5 ms.
+        """
+        self.output_dir = output_dir
+        self.interval = interval
+        self.counter = 0
+
+    def run(self, name, func, *args, **kwargs):
+        """
+        Run a function under the profiler and print a summary afterwards.
+
+        :param name: Name of the command, used for the file names.
+        :param func: Function to profile.
+        :param args: Positional arguments of the function.
+        :param kwargs: Keyword arguments of the function.
+        :return: Return value of the function.
+        """
+        profile = cProfile.Profile()
+        sampler = _StackSampler(threading.get_ident(), self.interval)
+
+        wall_start = time.perf_counter()
+        # CPU time of the profiled thread only, without the sampler and other worker threads.
+        cpu_start = time.thread_time()
+        sampler.start()
+        profile.enable()
+
+        try:
+            return func(*args, **kwargs)
+        finally:
+            profile.disable()
+            sampler.stop()
+            wall = time.perf_counter() - wall_start
+            cpu = time.thread_time() - cpu_start
+
+            # A failing report must neither end the CLI nor replace the result or exception of the command.
+            try:
+                self._report(name, profile, sampler.stacks, wall, cpu)
+            except Exception as e:
+                print("Profile of '{}' could not be written: {}".format(name, e))
+
+    def _report(self, name, profile, stacks, wall, cpu):
+        """
+        Write the profile files and print the time split into network wait and CPU phases.
+        """
+        os.makedirs(self.output_dir, exist_ok=True)
+
+        self.counter += 1
+        file_name = "{}-{}-{}".format(re.sub(r"[^\w-]", "_", name), time.strftime("%Y%m%d-%H%M%S"), self.counter)
+        base = os.path.join(self.output_dir, file_name)
+
+        stats = pstats.Stats(profile)
+        stats.dump_stats(base + ".prof")
+
+        with open(base + ".folded", "w") as f:
+            for stack, count in sorted(stacks.items()):
+                print("{} {}".format(stack, count), file=f)
+
+        http = sum(entry[3] for key, entry in stats.stats.items() if key[2] in HTTP_FUNCTIONS)
+
+        print("Profile of '{}':".format(name))
+        print("  Wall time:        {:8.3f} s".format(wall))
+        print("  CPU time:         {:8.3f} s".format(cpu))
+        print("  Wait time:        {:8.3f} s".format(max(wall - cpu, 0.0)))
+        print("  HTTP requests:    {:8.3f} s".format(http))
+        print("  Written: {0}.prof, {0}.folded".format(base))
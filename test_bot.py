@@ -0,0 +1,183 @@
+#!/usr/bin/env python
+#
+#   test_bot
+#
+#   Tests for the Spark bot and its scheduler.
+#
+#   REQUIREMENTS:
+#       - None
+#
+
+import hashlib
+import hmac
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+from bot import MAX_EVENT_SIZE, CommandScheduler, ErrorBot, SparkBot, create_server
+
+
+def _bot(message):
+    spark = mock.Mock()
+    spark.get_people_me.return_value = {"id": "bot"}
+    spark.get_message.return_value = message
+    return SparkBot(mock.Mock(), spark, "secret", workers=2)
+
+
+class TestSparkBot(unittest.TestCase):
+
+    def test_signature(self):
+        bot = _bot({})
+        body = b'{"data": {"id": "m1"}}'
+        signature = hmac.new(b"secret", body, hashlib.sha1).hexdigest()
+
+        self.assertTrue(bot.verify_signature(body, signature))
+        self.assertFalse(bot.verify_signature(body + b" ", signature))
+        self.assertFalse(bot.verify_signature(body, None))
+
+    def test_room_and_person_are_taken_from_message(self):
+        bot = _bot({"roomId": "r1", "personId": "p1", "text": "devices"})
+        bot.scheduler.submit = mock.Mock()
+
+        bot.handle_event({"data": {"id": "m1", "roomId": "forged", "personId": "forged"}})
+
+        room_id, person_id, _ = bot.scheduler.submit.call_args[0]
+        self.assertEqual((room_id, person_id), ("r1", "p1"))
+
+    def test_execute_devices(self):
+        bot = _bot({})
+        bot.lib.spark_network_devices.return_value = "devices"
+
+        self.assertEqual(bot.execute_text("ApicBot devices -m 3"), "devices")
+        bot.lib.get_network_devices.assert_called_once_with(max=3)
+
+        with self.assertRaises(ErrorBot):
+            bot.execute_text("devices -m three")
+
+    def test_execute_pathtrace(self):
+        bot = _bot({})
+        bot.lib.pathtrace.return_value = "path"
+
+        self.assertEqual(bot.execute_text("pathtrace 10.1.1.1 10.2.2.2"), "path")
+        bot.lib.pathtrace.assert_called_once_with("10.1.1.1", "10.2.2.2")
+
+        for text in ("pathtrace 10.1.1.1", "pathtrace 10.1.1.1 host", "pathtrace 10.1.1.1 10.2.2.2 10.3.3.3"):
+            with self.assertRaises(ErrorBot):
+                bot.execute_text(text)
+
+    def test_unknown_command(self):
+        with self.assertRaises(ErrorBot):
+            _bot({}).execute_text("hello")
+
+    def test_own_messages_are_ignored(self):
+        bot = _bot({"roomId": "r1", "personId": "bot", "text": "devices"})
+        bot.scheduler.submit = mock.Mock()
+
+        bot.handle_event({"data": {"id": "m1"}})
+
+        bot.scheduler.submit.assert_not_called()
+
+
+class TestWebhookServer(unittest.TestCase):
+
+    def setUp(self):
+        self.bot = _bot({"roomId": "r1", "personId": "p1", "text": "devices"})
+        self.bot.scheduler.submit = mock.Mock()
+        self.server = create_server(self.bot, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+    def _post(self, headers, body=b""):
+        with socket.create_connection(self.server.server_address, timeout=5) as conn:
+            request = "POST / HTTP/1.1\r\nHost: localhost\r\n" + "".join(h + "\r\n" for h in headers) + "\r\n"
+            conn.sendall(request.encode("ascii") + body)
+            return int(conn.recv(1024).split()[1])
+
+    def test_invalid_content_length(self):
+        self.assertEqual(self._post([]), 411)
+        self.assertEqual(self._post(["Content-Length: abc"]), 400)
+        self.assertEqual(self._post(["Content-Length: -1"]), 400)
+        self.assertEqual(self._post(["Content-Length: {}".format(MAX_EVENT_SIZE + 1)]), 413)
+        self.bot.scheduler.submit.assert_not_called()
+
+    def test_signed_event(self):
+        body = b'{"data": {"id": "m1"}}'
+        signature = hmac.new(b"secret", body, hashlib.sha1).hexdigest()
+
+        self.assertEqual(self._post(["Content-Length: {}".format(len(body))], body), 403)
+        self.assertEqual(self._post(["Content-Length: {}".format(len(body)), "X-Spark-Signature: " + signature],
+                                    body), 200)
+        self.assertEqual(self.bot.scheduler.submit.call_count, 1)
+
+
+class TestCommandScheduler(unittest.TestCase):
+
+    def test_room_order_with_several_workers(self):
+        scheduler = CommandScheduler(workers=4, user_limit=4)
+        order = []
+
+        def job(index):
+            def run():
+                time.sleep(0.005 * (index % 3))
+                order.append(index)
+            return run
+
+        for index in range(12):
+            scheduler.submit("room", "user-%i" % (index % 3), job(index))
+
+        scheduler.shutdown()
+
+        self.assertEqual(order, list(range(12)))
+
+    def test_user_limit_blocks_room_but_not_others(self):
+        scheduler = CommandScheduler(workers=4, user_limit=1)
+        release = threading.Event()
+        started = []
+
+        def job(name, block=False):
+            def run():
+                started.append(name)
+                if block:
+                    release.wait(5)
+            return run
+
+        scheduler.submit("room-a", "user-1", job("a", block=True))
+        scheduler.submit("room-b", "user-1", job("b"))
+        scheduler.submit("room-c", "user-2", job("c"))
+
+        end = time.time() + 5
+        while "c" not in started and time.time() < end:
+            time.sleep(0.001)
+
+        self.assertEqual(sorted(started), ["a", "c"])
+
+        release.set()
+        scheduler.shutdown()
+
+        self.assertEqual(started[-1], "b")
+
+    def test_shutdown_finishes_queued_jobs(self):
+        scheduler = CommandScheduler(workers=1, user_limit=1)
+        done = []
+        lock = threading.Lock()
+
+        def job():
+            time.sleep(0.01)
+            with lock:
+                done.append(1)
+
+        for _ in range(5):
+            scheduler.submit("room", "user", job)
+
+        scheduler.shutdown()
+
+        self.assertEqual(len(done), 5)
+        self.assertEqual(scheduler.pending, 0)
+        with self.assertRaises(ErrorBot):
+            scheduler.submit("room", "user", job)
+
+
+if __name__ == '__main__':
+    unittest.main()
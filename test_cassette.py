@@ -0,0 +1,117 @@
+#!/usr/bin/env python
+#
+#   test_cassette
+#
+#   Tests for recording and replaying HTTP traffic.
+#
+#   REQUIREMENTS:
+#       - requests
+#
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+from cassette import Cassette, CassetteMode, ErrorCassette, REDACTED
+
+
+def _response(status_code, body, headers=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.content = json.dumps(body).encode("utf-8")
+    return response
+
+
+class TestCassette(unittest.TestCase):
+
+    def setUp(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        self.path = os.path.join(directory, "session.jsonl.gz")
+        self.session = mock.Mock()
+
+    def _record(self, *interactions):
+        """
+        Record (method, url, data, response) tuples and close the cassette.
+        """
+        cassette = Cassette(self.path, CassetteMode.record)
+        for method, url, data, response in interactions:
+            self.session.request.return_value = response
+            cassette.request(self.session, method, url, data=data, timeout=10)
+        cassette.close()
+
+    def test_round_trip(self):
+        self._record(("GET", "https://apic/api/v1/network-device", None,
+                      _response(200, {"response": [1]}, {"ETag": '"abc"', "Set-Cookie": "id=1"})))
+
+        response = Cassette(self.path, CassetteMode.replay).request(None, "GET", "https://apic/api/v1/network-device")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["etag"], '"abc"')
+        self.assertNotIn("set-cookie", response.headers)
+        self.assertEqual(response.json(), {"response": [1]})
+
+    def test_replay_in_order_then_repeat_last(self):
+        url = "https://apic/api/v1/network-device"
+        self._record(*[("GET", url, None, _response(200, {"n": n})) for n in range(3)])
+
+        cassette = Cassette(self.path, CassetteMode.replay)
+
+        self.assertEqual([cassette.request(None, "GET", url).json()["n"] for _ in range(5)], [0, 1, 2, 2, 2])
+
+    def test_login_key_and_ticket_do_not_contain_credentials(self):
+        url = "https://apic/api/v1/ticket"
+        login = '{"username": "user", "password": "secret"}'
+
+        self.assertEqual(Cassette.request_key("POST", url, login), Cassette.request_key("POST", url, "other"))
+        self.assertNotEqual(Cassette.request_key("POST", url + "x", login), Cassette.request_key("POST", url + "x"))
+
+        self._record(("POST", url, login, _response(200, {"response": {"serviceTicket": "ST-1"}})))
+
+        response = Cassette(self.path, CassetteMode.replay).request(None, "POST", url, data="any")
+        self.assertEqual(response.json()["response"]["serviceTicket"], REDACTED)
+
+    def test_realtime_sleeps_for_recorded_latency(self):
+        url = "https://apic/api/v1/network-device"
+        with mock.patch("cassette.time.perf_counter", side_effect=[1.0, 1.25]):
+            self._record(("GET", url, None, _response(200, {})))
+
+        with mock.patch("cassette.time.sleep") as sleep:
+            Cassette(self.path, CassetteMode.replay, realtime=True).request(None, "GET", url)
+            sleep.assert_called_once_with(0.25)
+
+        with mock.patch("cassette.time.sleep") as sleep:
+            Cassette(self.path, CassetteMode.replay).request(None, "GET", url)
+            sleep.assert_not_called()
+
+    def test_missing_interaction_raises(self):
+        self._record()
+
+        with self.assertRaises(ErrorCassette):
+            Cassette(self.path, CassetteMode.replay).request(None, "GET", "https://apic/api/v1/host")
+
+    def test_unclosed_cassette_can_be_replayed(self):
+        url = "https://apic/api/v1/network-device"
+        cassette = Cassette(self.path, CassetteMode.record)
+        for n in range(2):
+            self.session.request.return_value = _response(200, {"n": n})
+            cassette.request(self.session, "GET", url)
+
+        # Copy the file as it is on disk before the cassette is closed, as after a crash.
+        crashed = self.path + ".crashed"
+        shutil.copy(self.path, crashed)
+        cassette.close()
+
+        replay = Cassette(crashed, CassetteMode.replay)
+        self.assertEqual([replay.request(None, "GET", url).json()["n"] for _ in range(2)], [0, 1])
+
+    def test_missing_file_raises(self):
+        with self.assertRaises(ErrorCassette):
+            Cassette(self.path, CassetteMode.replay)
+
+
+if __name__ == '__main__':
+    unittest.main()
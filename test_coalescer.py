@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+#
+#   test_coalescer
+#
+#   Tests for coalescing identical in-flight requests.
+#
+#   REQUIREMENTS:
+#       - requests
+#
+
+import json
+import threading
+import time
+import unittest
+from unittest import mock
+from coalescer import RequestCoalescer
+from enums import ApiRequest
+from wrapper_apic import WrapperAPIC
+
+CALLERS = 8
+
+
+def _wait_for(condition, timeout=5):
+    end = time.time() + timeout
+    while not condition():
+        if time.time() > end:
+            raise AssertionError("Condition not met in time")
+        time.sleep(0.001)
+
+
+def _run_threads(target, count=CALLERS):
+    threads = [threading.Thread(target=target) for _ in range(count)]
+    for thread in threads:
+        thread.start()
+    return threads
+
+
+class TestRequestCoalescer(unittest.TestCase):
+
+    def setUp(self):
+        self.coalescer = RequestCoalescer()
+        self.release = threading.Event()
+        self.calls = 0
+
+    def _blocking_call(self, result=None, error=None):
+        def func():
+            self.calls += 1
+            # Keep the call in flight until all callers have joined it.
+            self.release.wait(5)
+            if error is not None:
+                raise error
+            return result
+        return func
+
+    def test_identical_calls_are_sent_once(self):
+        results = []
+        func = self._blocking_call(result=b"body")
+
+        threads = _run_threads(lambda: results.append(self.coalescer.call("key", func)))
+        _wait_for(lambda: self.coalescer.stats()["saved"] == CALLERS - 1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(results, [b"body"] * CALLERS)
+        self.assertEqual(self.coalescer.stats(), {"sent": 1, "saved": CALLERS - 1})
+
+    def test_error_reaches_every_caller(self):
+        errors = []
+        func = self._blocking_call(error=ValueError("failed"))
+
+        def call():
+            try:
+                self.coalescer.call("key", func)
+            except ValueError as e:
+                errors.append(e)
+
+        threads = _run_threads(call)
+        _wait_for(lambda: self.coalescer.stats()["saved"] == CALLERS - 1)
+        self.release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(len(errors), CALLERS)
+
+    def test_calls_after_completion_are_sent_again(self):
+        self.release.set()
+        func = self._blocking_call(result=1)
+
+        self.coalescer.call("key", func)
+        self.coalescer.call("key", func)
+
+        self.assertEqual(self.calls, 2)
+
+
+class TestWrapperAPICCoalescing(unittest.TestCase):
+
+    def test_callers_get_their_own_result(self):
+        with mock.patch("wrapper_apic.requests.Session") as session_cls:
+            session = session_cls.return_value
+            ticket = mock.Mock(status_code=200)
+            ticket.json.return_value = {"response": {"serviceTicket": "t1"}}
+            session.request.return_value = ticket
+            apic = WrapperAPIC("https://apic/", "user", "pw")
+
+            def request(method, url, **kwargs):
+                _wait_for(lambda: apic.coalescer.stats()["saved"] == 1)
+                content = json.dumps({"response": [1]}).encode("utf-8")
+                return mock.Mock(status_code=200, headers={}, encoding=None, content=content)
+
+            session.request.side_effect = request
+            results = []
+            threads = _run_threads(lambda: results.append(apic.send_request("network-device", ApiRequest.get)), 2)
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual([c[0][0] for c in session.request.call_args_list], ["POST", "GET"])
+        self.assertEqual(results[0], results[1])
+        self.assertIsNot(results[0], results[1])
+
+        results[0]["response"].append(2)
+        self.assertEqual(results[1], {"response": [1]})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+#
+#   test_network_device
+#
+#   Tests for the network device record.
+#
+#   REQUIREMENTS:
+#       - None
+#
+
+import unittest
+from network_device import NetworkDevice, format_uptime, parse_uptime, parse_uptime_format
+
+
+class TestUptime(unittest.TestCase):
+
+    def test_round_trip(self):
+        for value in ("474 days, 6:22:19.43", "1 day, 0:00:01.00", "6:22:19", "0:00:05", "6:22:19.4", "25:00:00",
+                      "0 days, 1:00:00", "2 days, 3:04:47.210"):
+            self.assertEqual(format_uptime(*parse_uptime_format(value)), value)
+
+    def test_default_format(self):
+        self.assertEqual(format_uptime(parse_uptime("25:00:00")), "1 day, 1:00:00")
+        self.assertEqual(format_uptime(parse_uptime("6:22:19.4")), "6:22:19.40")
+
+    def test_rounding_carries_over(self):
+        self.assertEqual(format_uptime(parse_uptime("0:00:59.999")), "0:01:00.00")
+
+    def test_invalid(self):
+        self.assertIsNone(parse_uptime("N/A"))
+        self.assertIsNone(parse_uptime(None))
+
+
+class TestNetworkDevice(unittest.TestCase):
+
+    def test_parsed_values(self):
+        device = NetworkDevice.from_api({"hostname": "Branch-Router1", "managementIpAddress": "207.3.1.1",
+                                         "upTime": "474 days, 6:00:26.48", "lastUpdated": "2016-10-17 14:05:36"})
+
+        self.assertEqual(device.ip_packed, bytes([207, 3, 1, 1]))
+        self.assertEqual(device.ip_address, "207.3.1.1")
+        self.assertEqual(device.up_time_str, "474 days, 6:00:26.48")
+        self.assertEqual(device.last_updated_str, "2016-10-17 14:05:36")
+        self.assertIsNone(device.raw)
+
+    def test_uptime_is_displayed_as_returned(self):
+        for value in ("6:22:19.4", "25:00:00", "0 days, 1:00:00", "1 day, 0:00:47.210", "1 days, 0:00:00"):
+            device = NetworkDevice.from_api({"hostname": "AP", "managementIpAddress": "10.0.0.1", "upTime": value,
+                                             "lastUpdated": "2016-10-17 14:05:36"})
+            self.assertEqual(device.up_time_str, value)
+
+    def test_unparsed_values_are_kept(self):
+        device = NetworkDevice.from_api({"hostname": "AP7081.059f.19ca", "managementIpAddress": "unknown",
+                                         "upTime": "N/A", "lastUpdated": "2016-10-17T14:05:36Z"})
+
+        self.assertEqual(device.ip_address, "unknown")
+        self.assertEqual(device.up_time_str, "N/A")
+        self.assertEqual(device.last_updated_str, "2016-10-17T14:05:36Z")
+
+    def test_missing_values(self):
+        device = NetworkDevice.from_api({"hostname": "AP", "managementIpAddress": None, "upTime": None,
+                                         "lastUpdated": None})
+
+        self.assertEqual((device.ip_address, device.up_time_str, device.last_updated_str), ("None", "None", "None"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python
+#
+#   test_profiler
+#
+#   Tests for the command profiler.
+#
+#   REQUIREMENTS:
+#       - None
+#
+
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from profiler import CommandProfiler
+
+
+class TestCommandProfiler(unittest.TestCase):
+
+    def setUp(self):
+        self.output_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.output_dir)
+
+    def test_writes_profile_files(self):
+        result = CommandProfiler(self.output_dir).run("devices", lambda: 42)
+
+        self.assertEqual(result, 42)
+        self.assertEqual(sorted(os.path.splitext(f)[1] for f in os.listdir(self.output_dir)), [".folded", ".prof"])
+
+    def test_name_cannot_leave_output_dir(self):
+        CommandProfiler(self.output_dir).run("../foo/bar", lambda: None)
+
+        self.assertEqual(len(os.listdir(self.output_dir)), 2)
+
+    def test_report_error_keeps_result(self):
+        path = os.path.join(self.output_dir, "file")
+        open(path, "w").close()
+
+        self.assertEqual(CommandProfiler(os.path.join(path, "sub")).run("devices", lambda: 7), 7)
+
+    def test_cpu_time_excludes_other_threads(self):
+        def busy():
+            end = time.perf_counter() + 0.3
+            while time.perf_counter() < end:
+                pass
+
+        def command():
+            thread = threading.Thread(target=busy)
+            thread.start()
+            thread.join()
+
+        profiler = CommandProfiler(self.output_dir)
+        reports = []
+        profiler._report = lambda name, profile, stacks, wall, cpu: reports.append(cpu)
+        profiler.run("devices", command)
+
+        self.assertLess(reports[0], 0.1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+#
+#   test_wrapper_apic
+#
+#   Tests for the APIC-EM API wrapper with a mocked
+#   HTTP session.
+#
+#   REQUIREMENTS:
+#       - requests
+#
+
+import json
+import unittest
+from unittest import mock
+from enums import ApiRequest
+from wrapper_apic import ErrorAPIC, WrapperAPIC
+
+
+def _response(status_code, body=None, headers=None):
+    response = mock.Mock()
+    response.status_code = status_code
+    response.headers = headers or {}
+    response.encoding = None
+    response.content = json.dumps(body).encode("utf-8") if body is not None else b""
+    response.json.side_effect = lambda: json.loads(response.content)
+    return response
+
+
+def _ticket(ticket):
+    return _response(200, {"response": {"serviceTicket": ticket}})
+
+
+class TestSendRequest(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("wrapper_apic.requests.Session")
+        self.session = patcher.start().return_value
+        self.addCleanup(patcher.stop)
+
+    def _wrapper(self, *responses):
+        self.session.request.side_effect = [_ticket("t1")] + list(responses)
+        return WrapperAPIC("https://apic/", "user", "pw")
+
+    def test_get_returns_parsed_json(self):
+        apic = self._wrapper(_response(200, {"response": [1, 2]}))
+
+        self.assertEqual(apic.send_request("network-device", ApiRequest.get), {"response": [1, 2]})
+
+        method, url = self.session.request.call_args[0]
+        self.assertEqual((method, url), ("GET", "https://apic/api/v1/network-device"))
+        self.assertEqual(self.session.request.call_args[1]["headers"]["x-auth-token"], "t1")
+
+    def test_post_returns_parsed_json(self):
+        apic = self._wrapper(_response(202, {"response": {"flowAnalysisId": "f1"}}))
+
+        res = apic.send_request("flow-analysis", ApiRequest.post, '{"sourceIP": "1.1.1.1"}')
+
+        self.assertEqual(res["response"]["flowAnalysisId"], "f1")
+        self.assertEqual(self.session.request.call_args[1]["data"], '{"sourceIP": "1.1.1.1"}')
+
+    def test_not_modified_is_served_from_cache(self):
+        apic = self._wrapper(_response(200, {"response": "v1"}, {"etag": '"abc"'}), _response(304))
+
+        self.assertEqual(apic.send_request("network-device", ApiRequest.get), {"response": "v1"})
+        self.assertEqual(apic.send_request("network-device", ApiRequest.get), {"response": "v1"})
+        self.assertEqual(self.session.request.call_args[1]["headers"]["if-none-match"], '"abc"')
+
+    def test_last_modified_is_revalidated(self):
+        last_modified = "Mon, 17 Oct 2016 14:05:36 GMT"
+        apic = self._wrapper(_response(200, {"response": "v1"}, {"last-modified": last_modified}), _response(304),
+                             _response(200, {"response": "v2"}, {"last-modified": last_modified}))
+
+        apic.send_request("network-device", ApiRequest.get)
+        self.assertEqual(apic.send_request("network-device", ApiRequest.get), {"response": "v1"})
+
+        headers = self.session.request.call_args[1]["headers"]
+        self.assertEqual(headers["if-modified-since"], last_modified)
+        self.assertNotIn("if-none-match", headers)
+
+        self.assertEqual(apic.send_request("network-device", ApiRequest.get), {"response": "v2"})
+
+    def test_responses_without_validators_are_not_cached(self):
+        apic = self._wrapper(_response(200, {"response": "v1"}), _response(200, {"response": "v2"}))
+
+        apic.send_request("network-device", ApiRequest.get)
+        self.assertEqual(apic.send_request("network-device", ApiRequest.get), {"response": "v2"})
+        self.assertNotIn("if-none-match", self.session.request.call_args[1]["headers"])
+        self.assertNotIn("if-modified-since", self.session.request.call_args[1]["headers"])
+
+    def test_unauthorized_logs_in_again(self):
+        apic = self._wrapper(_response(401), _ticket("t2"), _response(200, {"response": "ok"}))
+
+        self.assertEqual(apic.send_request("network-device", ApiRequest.get), {"response": "ok"})
+        self.assertEqual(apic.token, "t2")
+
+    def test_error_status_raises(self):
+        apic = self._wrapper(_response(500))
+
+        with self.assertRaises(ErrorAPIC):
+            apic.send_request("network-device", ApiRequest.get)
+
+
+if __name__ == '__main__':
+    unittest.main()
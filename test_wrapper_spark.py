@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+#
+#   test_wrapper_spark
+#
+#   Tests for the Cisco Spark API wrapper.
+#
+#   REQUIREMENTS:
+#       - requests
+#
+
+import unittest
+from unittest import mock
+from wrapper_spark import ErrorSpark, WrapperSpark
+
+
+class TestBroadcastMessage(unittest.TestCase):
+
+    def test_result_for_every_room(self):
+        spark = WrapperSpark("Bearer token")
+        errors = {"r2": ErrorSpark("The following status code was returned: 404"), "r3": ValueError("no JSON")}
+
+        def post_message(room_id, **kwargs):
+            if room_id in errors:
+                raise errors[room_id]
+            return {"id": "m1"}
+
+        with mock.patch.object(spark, "post_message", side_effect=post_message):
+            results = spark.broadcast_message(["r1", "r2", "r3"], text="report")
+
+        self.assertEqual([r.room_id for r in results], ["r1", "r2", "r3"])
+        self.assertEqual([r.success for r in results], [True, False, False])
+        self.assertIn("404", results[1].error)
+        self.assertIn("ValueError", results[2].error)
+
+
+if __name__ == '__main__':
+    unittest.main()
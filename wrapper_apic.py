@@ -24,6 +24,8 @@ import json
 import requests
 import urllib.parse as urlparse
 import xml.etree.ElementTree as et
+from coalescer import RequestCoalescer
+from collections import namedtuple
 from enums import ApiEncoding
 from enums import ApiRequest
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
@@ -33,6 +35,11 @@ Default base URI of the APIC-EM API
 """
 DEFAULT_API_URI = "/api/v1/"
 
+"""
+Cached body of a GET response together with its validators for conditional requests
+"""
+CachedResponse = namedtuple("CachedResponse", ["etag", "last_modified", "content"])
+
 
 class ErrorAPIC(Exception):
     """
@@ -45,13 +52,16 @@ class WrapperAPIC(object):
     APIC-EM API Wrapper class.
     """
 
-    def __init__(self, url, username, password):
+    def __init__(self, url, username, password, use_cache=True, cassette=None):
         """
         Create a new wrapper instance.
 
         :param url: URL/Host to APIC-EM.
         :param username: Username to access API.
         :param password: Password to access API.
+        :param use_cache: (Optional) Revalidate GET requests with ETag/Last-Modified and serve 304 responses from a
+                          local cache. Default is True.
+        :param cassette: (Optional) Cassette to record or replay all HTTP traffic.
         """
         requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
@@ -59,6 +69,10 @@ class WrapperAPIC(object):
         self.username = username
         self.password = password
         self.token = None
+        self.use_cache = use_cache
+        self.cache = {}
+        self.cassette = cassette
+        self.coalescer = RequestCoalescer()
         self.login()
 
     def login(self):
@@ -72,13 +86,17 @@ class WrapperAPIC(object):
             headers = {"content-type": "application/json"}
 
             session = requests.Session()
-            response = session.request("POST", self.base_url + "ticket", timeout=10, verify=False, data=json_login, headers=headers)
+            response = self._http(session, "POST", self.base_url + "ticket", timeout=10, verify=False, data=json_login,
+                                  headers=headers)
 
             if response.status_code != 200:
                 raise Exception
 
             self.token = response.json()["response"]["serviceTicket"]
 
+            # Cached responses are scoped to a service ticket and cannot be revalidated with a new one.
+            self.cache.clear()
+
         except Exception:
             raise ErrorAPIC("Connection to APIC-EM API failed. Please verify user credentials.")
 
@@ -105,22 +123,64 @@ class WrapperAPIC(object):
         else:
             headers["content-type"] = "application/json"
 
+        cache_key = (resource_url, enc, self.token)
+        cached = None
+
+        if verb == ApiRequest.get and self.use_cache:
+            cached = self.cache.get(cache_key)
+
+            if cached is not None:
+                if cached.etag is not None:
+                    headers["if-none-match"] = cached.etag
+                if cached.last_modified is not None:
+                    headers["if-modified-since"] = cached.last_modified
+
         if verb == ApiRequest.get:
-            response = session.request("GET", self.base_url + resource_url, timeout=10, verify=False, headers=headers)
+            # Identical GETs that are already in flight in another thread share its response.
+            url = self.base_url + resource_url
+            key = (url, enc, self.token, headers.get("if-none-match"), headers.get("if-modified-since"))
+            response = self.coalescer.call(key, lambda: self._http(session, "GET", url, timeout=10, verify=False,
+                                                                   headers=headers))
         elif verb == ApiRequest.post:
-            response = session.request("POST", self.base_url + resource_url, timeout=10, verify=False, headers=headers,
-                                   data=payload)
+            response = self._http(session, "POST", self.base_url + resource_url, timeout=10, verify=False,
+                                  headers=headers, data=payload)
         else:
             raise ErrorAPIC("Internal error")
 
-        if response.status_code == 401:
-            self.send_request(resource_url, verb, payload, enc, relogin=True)
+        if response.status_code == 304 and cached is not None:
+            content = cached.content
+        elif response.status_code == 401:
+            return self.send_request(resource_url, verb, payload, enc, relogin=True)
         elif response.status_code != 200 and response.status_code != 202:
             raise ErrorAPIC("The following status code was returned: {}".format(response.status_code))
+        else:
+            content = response.content
+
+            etag = response.headers.get("etag")
+            last_modified = response.headers.get("last-modified")
+
+            if verb == ApiRequest.get and self.use_cache and response.status_code == 200 and \
+                    (etag is not None or last_modified is not None):
+                self.cache[cache_key] = CachedResponse(etag, last_modified, content)
 
         if enc == ApiEncoding.xml:
-            return et.fromstring(response.content)
+            return et.fromstring(content)
         elif enc == ApiEncoding.json:
-            return response.json()
+            return json.loads(content.decode(response.encoding or "utf-8"))
         else:
-            raise ErrorAPIC("Internal error")
\ No newline at end of file
+            raise ErrorAPIC("Internal error")
+
+    def _http(self, session, method, url, **kwargs):
+        """
+        Send an HTTP request, through the cassette if one is set.
+
+        :param session: Session to send the request.
+        :param method: HTTP method.
+        :param url: Full URL of the request.
+        :param kwargs: Further arguments passed to 'requests.Session.request'.
+        :return: HTTP response.
+        """
+        if self.cassette is not None:
+            return self.cassette.request(session, method, url, **kwargs)
+
+        return session.request(method, url, **kwargs)
\ No newline at end of file
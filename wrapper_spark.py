@@ -22,8 +22,13 @@
 
 import json
 import requests
+import time
 import urllib.parse as urlparse
+from coalescer import RequestCoalescer
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from enums import ApiRequest
+from requests.adapters import HTTPAdapter
 from requests.packages.urllib3.exceptions import InsecureRequestWarning
 from urllib.parse import urlencode
 
@@ -32,6 +37,16 @@ Default base URI of the Spark API
 """
 DEFAULT_API_URI = "https://api.ciscospark.com/v1/people"
 
+"""
+Maximum number of concurrent requests, also used as size of the connection pool
+"""
+MAX_CONNECTIONS = 20
+
+"""
+Result of posting a message to a single room during a broadcast
+"""
+BroadcastResult = namedtuple("BroadcastResult", ["room_id", "success", "elapsed", "error"])
+
 
 class ErrorSpark(Exception):
     """
@@ -44,15 +59,22 @@ class WrapperSpark(object):
     Cisco Spark API Wrapper class.
     """
 
-    def __init__(self, token):
+    def __init__(self, token, cassette=None):
         """
         Create a new wrapper instance.
 
         :param token: Spark user token (without 'Bearer' prefix).
+        :param cassette: (Optional) Cassette to record or replay all HTTP traffic.
         """
         self.default_header = {'Content-type': 'application/json', 'Authorization': token}
+        self.cassette = cassette
+        self.coalescer = RequestCoalescer()
         requests.packages.urllib3.disable_warnings(InsecureRequestWarning)
 
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_CONNECTIONS)
+        self.session = requests.Session()
+        self.session.mount("https://", adapter)
+
     def set_new_token(self, token):
         """
         Set a new user token. If the new token is invalid, then the previous token is kept.
@@ -123,6 +145,15 @@ class WrapperSpark(object):
 
         return self._request_stub("rooms", ApiRequest.get, query=params)
 
+    def get_message(self, message_id):
+        """
+        Shows details for a message, by message ID.
+
+        :param message_id: The message ID.
+        :return: API response in JSON.
+        """
+        return self._request_stub("messages/" + message_id, ApiRequest.get)
+
     def post_message(self, room_id=None, to_person_id=None, to_person_email=None, text=None, markdown=None, files=None):
         """
         Posts a plain text message, and optionally, a media content attachment, to a room.
@@ -151,6 +182,36 @@ class WrapperSpark(object):
 
         return self._request_stub("messages", ApiRequest.post, payload=params)
 
+    def broadcast_message(self, room_ids, text=None, markdown=None, files=None):
+        """
+        Posts the same message to several rooms concurrently.
+
+        :param room_ids: List of room IDs.
+        :param text: (Optional) The message, in plain text or in rich text if markdown is specified.
+        :param markdown: (Optional) The message, in markdown format.
+        :param files: (Optional) A URL reference for the message attachment.
+        :return: List of BroadcastResult in the order of the room IDs.
+        """
+        def post(room_id):
+            start = time.perf_counter()
+            try:
+                self.post_message(room_id, text=text, markdown=markdown, files=files)
+                error = None
+            except ErrorSpark as e:
+                error = str(e)
+            except requests.exceptions.RequestException as e:
+                error = "Connection failed: {}".format(e)
+            except Exception as e:
+                # Every room must get a result, e.g. also for invalid JSON responses or missing cassette entries.
+                error = "{}: {}".format(type(e).__name__, e)
+            return BroadcastResult(room_id, error is None, time.perf_counter() - start, error)
+
+        if not room_ids:
+            return []
+
+        with ThreadPoolExecutor(max_workers=min(len(room_ids), MAX_CONNECTIONS)) as executor:
+            return list(executor.map(post, room_ids))
+
     def _request_stub(self, resource_url, verb, query=None, payload=None):
         """
         Stub method for sending requests to the Cisco Spark API.
@@ -177,14 +238,16 @@ class WrapperSpark(object):
 
             url = urlparse.urlunparse(url_parts)
 
-        session = requests.Session()
+        session = self.session
 
         if verb == ApiRequest.post:
-            response = session.request("POST", url, timeout=10, verify=False, data=payload_json,
-                                       headers=self.default_header)
+            response = self._http(session, "POST", url, timeout=10, verify=False, data=payload_json,
+                                  headers=self.default_header)
         elif verb == ApiRequest.get:
-            response = session.request("GET", url, timeout=10, verify=False, data=payload_json,
-                                       headers=self.default_header)
+            # Identical GETs that are already in flight in another thread share its response.
+            key = (url, payload_json, self.default_header["Authorization"])
+            response = self.coalescer.call(key, lambda: self._http(session, "GET", url, timeout=10, verify=False,
+                                                                   data=payload_json, headers=self.default_header))
         else:
             raise ErrorSpark("Internal error")
 
@@ -192,3 +255,18 @@ class WrapperSpark(object):
             raise ErrorSpark("The following status code was returned: {}".format(response.status_code))
 
         return response.json()
+
+    def _http(self, session, method, url, **kwargs):
+        """
+        Send an HTTP request, through the cassette if one is set.
+
+        :param session: Session to send the request.
+        :param method: HTTP method.
+        :param url: Full URL of the request.
+        :param kwargs: Further arguments passed to 'requests.Session.request'.
+        :return: HTTP response.
+        """
+        if self.cassette is not None:
+            return self.cassette.request(session, method, url, **kwargs)
+
+        return session.request(method, url, **kwargs)